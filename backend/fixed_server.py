@@ -4,18 +4,25 @@ Minimal HTTP server for OSM Map Exporter
 Works without FastAPI dependencies
 """
 
-import json
+import orjson
+import gzip
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import concurrent.futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
 from datetime import datetime
 
+_dump = orjson.dumps
+
 try:
     from simple_osm_extractor import SimpleOSMExtractor as RealOSMExtractor
 except ImportError:
     print("⚠️ SimpleOSMExtractor not available, using mock data")
     class RealOSMExtractor:
+        async def aclose(self):
+            pass
+        
         async def extract_data(self, bbox, layers):
             return {
                 "bbox": bbox,
@@ -42,14 +49,20 @@ except ImportError:
                 }
             }
 
+# One event loop for the whole server, running in a background thread, so
+# extractions share one loop and the extractor's keep-alive HTTP client
+LOOP = asyncio.new_event_loop()
+threading.Thread(target=LOOP.run_forever, daemon=True).start()
+
+osm_extractor = RealOSMExtractor()
+
 class OSMRequestHandler(BaseHTTPRequestHandler):
+    # Buffer writes so headers and body go out together; handle_one_request
+    # flushes wfile once the response is complete
+    wbufsize = 64 * 1024
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-    
-    def _get_osm_extractor(self):
-        if not hasattr(self, 'osm_extractor'):
-            self.osm_extractor = RealOSMExtractor()
-        return self.osm_extractor
 
     def do_GET(self):
         """Handle GET requests"""
@@ -65,7 +78,7 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                 "ok": True,
                 "timestamp": datetime.now().isoformat()
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(_dump(response))
         else:
             # Handle root path
             self.send_response(200)
@@ -103,20 +116,13 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
         post_data = self.rfile.read(content_length)
         
         try:
-            request_data = json.loads(post_data.decode('utf-8'))
-        except:
+            request_data = orjson.loads(post_data)
+        except orjson.JSONDecodeError:
             request_data = {}
         
         if parsed_path.path == '/api/extract':
             print(f"🔍 Extract request received: {request_data}")
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             try:
                 # Extract real OSM data
                 bbox = request_data.get('bbox', {
@@ -130,12 +136,14 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                 print(f"📍 Bbox: {bbox}")
                 print(f"📊 Layers: {layers}")
                 
-                # Use asyncio to run the async function
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                osm_extractor = self._get_osm_extractor()
-                response = loop.run_until_complete(osm_extractor.extract_data(bbox, layers))
-                loop.close()
+                # Run the extraction on the shared background loop
+                future = asyncio.run_coroutine_threadsafe(osm_extractor.extract_data(bbox, layers), LOOP)
+                try:
+                    response = future.result(timeout=60)
+                except concurrent.futures.TimeoutError:
+                    # Don't leave a stuck Overpass call running on the shared loop
+                    future.cancel()
+                    raise
                 
                 print(f"✅ OSM data extracted: {response['summary']}")
                 
@@ -165,7 +173,23 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                     "error": f"Real extraction failed: {str(e)}"
                 }
             
-            self.wfile.write(json.dumps(response).encode())
+            body = _dump(response)
+            # GeoJSON is very repetitive; level 1 gzip shrinks it cheaply
+            gzipped = len(body) >= 1024 and 'gzip' in self.headers.get('Accept-Encoding', '')
+            if gzipped:
+                body = gzip.compress(body, compresslevel=1)
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.end_headers()
+            self.wfile.write(body)
             
         elif parsed_path.path == '/api/export/pdf':
             self.send_response(200)
@@ -177,7 +201,7 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                 "url": "/download/test.pdf",
                 "message": "PDF export not yet implemented"
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(_dump(response))
             
         elif parsed_path.path == '/api/export/pptx':
             self.send_response(200)
@@ -189,7 +213,7 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                 "url": "/download/test.pptx",
                 "message": "PPTX export not yet implemented"
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(_dump(response))
             
         else:
             self.send_response(404)
@@ -198,7 +222,7 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
             self.end_headers()
             
             response = {"error": "Not found"}
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(_dump(response))
 
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
@@ -212,7 +236,7 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
 def run_server():
     """Run the HTTP server"""
     server_address = ('0.0.0.0', 8000)
-    httpd = HTTPServer(server_address, OSMRequestHandler)
+    httpd = ThreadingHTTPServer(server_address, OSMRequestHandler)
     print("🚀 OSM Map Exporter API Server running on http://localhost:8000")
     print("📚 API endpoints:")
     print("  GET  /api/health")
@@ -226,6 +250,7 @@ def run_server():
     except KeyboardInterrupt:
         print("\n🛑 Server stopped")
         httpd.server_close()
+        asyncio.run_coroutine_threadsafe(osm_extractor.aclose(), LOOP).result(timeout=5)
 
 if __name__ == '__main__':
     run_server()
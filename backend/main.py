@@ -1,16 +1,17 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import httpx
-import json
+import msgspec
 import os
 from datetime import datetime
 import asyncio
 from pathlib import Path
 
-from services.osm_extractor import OSMExtractor
+from services.osm_extractor import OSMExtractor, encode_geojson
 from services.poi_classifier import POIClassifier
 from services.export_service import ExportService
 from models.schemas import (
@@ -22,7 +23,8 @@ from models.schemas import (
 app = FastAPI(
     title="OSM Map Exporter API",
     description="Extract OSM data and export styled maps as PDF/PPTX",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -33,22 +35,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Initialize services
 osm_extractor = OSMExtractor()
 poi_classifier = POIClassifier()
 export_service = ExportService()
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Release long-lived service resources"""
+    await osm_extractor.aclose()
+    await export_service.aclose()
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {"ok": True, "timestamp": datetime.now().isoformat()}
 
-@app.post("/api/extract", response_model=ExtractResponse)
-async def extract_osm_data(request: ExtractRequest):
+@app.post("/api/extract", responses={200: {"model": ExtractResponse}})
+async def extract_osm_data(http_request: Request):
     """Extract OSM data for specified area and layers"""
     try:
-        # Convert Pydantic models to dictionaries
+        request = msgspec.json.decode(await http_request.body(), type=ExtractRequest)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        # Convert request structs to dictionaries
         bbox_dict = None
         if request.bbox:
             bbox_dict = {
@@ -71,8 +85,15 @@ async def extract_osm_data(request: ExtractRequest):
             result["layers"]["pois"] = poi_classifier.classify_pois(
                 result["layers"]["pois"]
             )
+            result["summary"]["poi_n_by_class"] = poi_classifier.get_classification_summary(
+                result["layers"]["pois"]
+            )
         
-        return ExtractResponse(**result)
+        # Result is built server-side, so skip re-validating it and stream it
+        # out layer by layer. Everything is plain dicts except the roads and
+        # buildings features, which stay RawFeature records until
+        # encode_geojson turns them into GeoJSON here at the HTTP boundary
+        return StreamingResponse(encode_geojson(result), media_type="application/json")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -106,8 +127,11 @@ async def download_file(filename: str):
 @app.delete("/api/cache")
 async def clear_cache(key: Optional[str] = Query(None)):
     """Clear cache (admin endpoint)"""
-    # Implementation for cache clearing
-    return {"message": "Cache cleared"}
+    try:
+        cleared = osm_extractor.clear_cache(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Cache cleared", "cleared": cleared}
 
 if __name__ == "__main__":
     import uvicorn
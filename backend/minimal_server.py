@@ -11,10 +11,18 @@ from urllib.parse import urlparse, parse_qs
 import threading
 from datetime import datetime
 try:
-    from real_osm_extractor import RealOSMExtractor
+    from real_osm_extractor import RealOSMExtractor, encode_result
 except ImportError:
     print("⚠️ RealOSMExtractor not available, using mock data")
+    
+    def encode_result(result):
+        # The mock extractor returns plain dicts only
+        return json.dumps(result).encode()
+    
     class RealOSMExtractor:
+        async def aclose(self):
+            pass
+        
         async def extract_data(self, bbox, layers):
             return {
                 "bbox": bbox,
@@ -150,8 +158,12 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
                 osm_extractor = self._get_osm_extractor()
-                response = loop.run_until_complete(osm_extractor.extract_data(bbox, layers))
-                loop.close()
+                try:
+                    response = loop.run_until_complete(osm_extractor.extract_data(bbox, layers))
+                finally:
+                    # The extractor's HTTP client is bound to this loop; close it with the loop
+                    loop.run_until_complete(osm_extractor.aclose())
+                    loop.close()
                 
                 print(f"✅ OSM data extracted: {response['summary']}")
                 
@@ -181,7 +193,7 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
                     "error": f"Real extraction failed: {str(e)}"
                 }
             
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(encode_result(response))
             
         elif parsed_path.path == '/api/export/pdf':
             self.send_response(200)
@@ -1,3 +1,4 @@
+import msgspec
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Union
 # Removed geojson_pydantic dependency
@@ -15,10 +16,17 @@ class BoundingBox(BaseModel):
     max_lon: float
     max_lat: float
 
-class ExtractRequest(BaseModel):
-    bbox: Optional[BoundingBox] = None
+# /api/extract request body, decoded with msgspec instead of Pydantic
+class BoundingBoxStruct(msgspec.Struct):
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+class ExtractRequest(msgspec.Struct):
+    bbox: Optional[BoundingBoxStruct] = None
     polygon: Optional[str] = None  # GeoJSON Polygon as string
-    layers: List[str] = ["roads", "buildings", "amenities", "pois"]
+    layers: List[str] = msgspec.field(default_factory=lambda: ["roads", "buildings", "amenities", "pois"])
 
 class LayerSummary(BaseModel):
     roads_km: Optional[float] = None
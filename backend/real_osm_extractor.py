@@ -5,62 +5,207 @@ Real OSM data extractor using Overpass API
 
 import httpx
 import json
+import orjson
+import numpy as np
 import asyncio
-from typing import Dict, List, Any, Tuple
+import functools
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+# Tag keys that mark an element as a POI/amenity
+POI_TAGS = ("amenity", "shop", "tourism", "leisure", "healthcare", "office", "government")
+POI_TAG_KEYS = frozenset(POI_TAGS)
+
+# Bboxes larger than this (in square degrees) are split into tiles fetched concurrently
+TILE_AREA_THRESHOLD = 0.01
+
+# overpass-api.de allows about 2 concurrent queries per IP
+OVERPASS_SLOTS = 2
+
+def _tile(bbox: Dict[str, float], n: int = 2) -> List[Dict[str, float]]:
+    """Split a bbox into an n x n grid of sub-bboxes"""
+    lon_step = (bbox["max_lon"] - bbox["min_lon"]) / n
+    lat_step = (bbox["max_lat"] - bbox["min_lat"]) / n
+    return [
+        {
+            "min_lon": bbox["min_lon"] + i * lon_step,
+            "min_lat": bbox["min_lat"] + j * lat_step,
+            "max_lon": bbox["max_lon"] if i == n - 1 else bbox["min_lon"] + (i + 1) * lon_step,
+            "max_lat": bbox["max_lat"] if j == n - 1 else bbox["min_lat"] + (j + 1) * lat_step
+        }
+        for i in range(n)
+        for j in range(n)
+    ]
+
+EARTH_RADIUS_KM = 6371.0
+
+def _total_length_km(lines: List[List[List[float]]]) -> float:
+    """Sum the great-circle (haversine) length of all lines in one vectorized pass"""
+    counts = np.fromiter((len(line) for line in lines), dtype=np.intp, count=len(lines))
+    pts = np.radians(np.asarray([coord for line in lines for coord in line], dtype=np.float64))
+    lon, lat = pts[:, 0], pts[:, 1]
+    dlon = np.diff(lon)
+    dlat = np.diff(lat)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    seg_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    # Drop the jumps from the end of one line to the start of the next
+    seg_km[np.cumsum(counts)[:-1] - 1] = 0.0
+    return float(seg_km.sum())
+
+@dataclass(slots=True)
+class OSMFeature:
+    """Compact feature record, turned into a GeoJSON Feature only when serialized"""
+    kind: str  # "LineString", "Polygon" or "Point"
+    coords: Any  # line vertices, the closed outer ring, or [lon, lat]
+    properties: Tuple[Tuple[str, Any], ...]
+
+def _to_geojson(feature: OSMFeature) -> Dict[str, Any]:
+    """Materialize an OSMFeature as a GeoJSON Feature dict"""
+    if not isinstance(feature, OSMFeature):
+        raise TypeError(f"Type is not JSON serializable: {type(feature).__name__}")
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": feature.kind,
+            "coordinates": [feature.coords] if feature.kind == "Polygon" else feature.coords
+        },
+        "properties": dict(feature.properties)
+    }
+
+def encode_result(result: Dict[str, Any]) -> bytes:
+    """Serialize an extract result to JSON bytes
+    
+    Layer features are OSMFeature records; orjson would otherwise dump them
+    as plain dataclasses, so they are passed through to _to_geojson.
+    """
+    return orjson.dumps(result, default=_to_geojson, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+
+@functools.lru_cache(maxsize=16)
+def _query_template(layers_key: frozenset) -> str:
+    """Build the Overpass query for a layer set, with a {bbox} placeholder"""
+    query_parts = []
+    
+    if "roads" in layers_key:
+        query_parts.append('way["highway"~"^(motorway|trunk|primary|secondary|tertiary|unclassified|residential|service|living_street|pedestrian|track|path|footway|cycleway|bridleway|steps)$"]({bbox});')
+    
+    if "buildings" in layers_key:
+        query_parts.append('way["building"]({bbox});')
+        
+    if "amenities" in layers_key or "pois" in layers_key:
+        for element_type in ("node", "way"):
+            for key in POI_TAGS:
+                query_parts.append(f'{element_type}["{key}"]({{bbox}});')
+    
+    if not query_parts:
+        return ""
+    
+    return f"""
+            [out:json][timeout:25];
+            (
+              {' '.join(query_parts)}
+            );
+            out geom;
+            """
+
 class RealOSMExtractor:
+    classification_rules = {
+        "Retail/Trade": ["shop", "amenity=marketplace", "amenity=mall"],
+        "Government": ["amenity=townhall", "amenity=courthouse", "amenity=embassy", "office=government", "government"],
+        "Education": ["amenity=school", "amenity=college", "amenity=university", "amenity=kindergarten", "amenity=library"],
+        "Health": ["amenity=hospital", "amenity=clinic", "amenity=doctors", "amenity=dentist", "amenity=pharmacy", "healthcare"],
+        "Transport": ["amenity=bus_station", "amenity=ferry_terminal", "amenity=bicycle_parking", "public_transport", "railway", "aeroway=terminal"],
+        "Culture/Leisure": ["amenity=theatre", "amenity=cinema", "amenity=arts_centre", "tourism=museum", "tourism=attraction", "leisure"],
+        "Hospitality": ["tourism=hotel", "tourism=guest_house", "tourism=motel", "tourism=hostel", "amenity=restaurant", "amenity=cafe", "amenity=fast_food", "amenity=bar", "amenity=pub"],
+        "Finance": ["amenity=bank", "amenity=atm", "amenity=bureau_de_change"],
+        "Services": ["amenity=post_office", "amenity=police", "amenity=fire_station", "amenity=car_rental", "amenity=car_wash", "office"],
+        "Religious": ["amenity=place_of_worship", "religion"]
+    }
+    
     def __init__(self):
         self.overpass_url = "https://overpass-api.de/api/interpreter"
+        self._client: Optional[httpx.AsyncClient] = None
+        self._overpass_sem: Optional[asyncio.Semaphore] = None
+        self._overpass_sem_loop: Optional[asyncio.AbstractEventLoop] = None
         
+        # Lookup tables keyed by tag; values carry the rule's position so
+        # the first matching rule in classification_rules still wins
+        self._eq_rules: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self._presence_rules: Dict[str, Tuple[int, str]] = {}
+        priority = 0
+        for category, rules in self.classification_rules.items():
+            for rule in rules:
+                if "=" in rule:
+                    key, value = rule.split("=", 1)
+                    self._eq_rules.setdefault((key, value), (priority, category))
+                else:
+                    self._presence_rules.setdefault(rule, (priority, category))
+                priority += 1
+        
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=10)
+            )
+        return self._client
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the Overpass slot semaphore for the running event loop"""
+        # Callers may drive the extractor from a fresh loop per request
+        loop = asyncio.get_running_loop()
+        if self._overpass_sem_loop is not loop:
+            self._overpass_sem = asyncio.Semaphore(OVERPASS_SLOTS)
+            self._overpass_sem_loop = loop
+        return self._overpass_sem
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def extract_data(self, bbox: Dict[str, float], layers: List[str]) -> Dict[str, Any]:
-        """Extract real OSM data using Overpass API"""
+        """Extract real OSM data using Overpass API
+        
+        Layer features are OSMFeature records; serialize the result with encode_result.
+        """
         try:
-            # Convert bbox to overpass format
-            overpass_bbox = f"{bbox['min_lat']},{bbox['min_lon']},{bbox['max_lat']},{bbox['max_lon']}"
-            
             # Build query based on requested layers
-            query_parts = []
-            
-            if "roads" in layers:
-                query_parts.append(f'way["highway"~"^(motorway|trunk|primary|secondary|tertiary|unclassified|residential|service|living_street|pedestrian|track|path|footway|cycleway|bridleway|steps)$"]({overpass_bbox});')
-            
-            if "buildings" in layers:
-                query_parts.append(f'way["building"]({overpass_bbox});')
-                
-            if "amenities" in layers or "pois" in layers:
-                query_parts.append(f'node["amenity"]({overpass_bbox});')
-                query_parts.append(f'node["shop"]({overpass_bbox});')
-                query_parts.append(f'node["tourism"]({overpass_bbox});')
-                query_parts.append(f'node["leisure"]({overpass_bbox});')
-                query_parts.append(f'node["healthcare"]({overpass_bbox});')
-                query_parts.append(f'node["office"]({overpass_bbox});')
-                query_parts.append(f'node["government"]({overpass_bbox});')
-                query_parts.append(f'way["amenity"]({overpass_bbox});')
-                query_parts.append(f'way["shop"]({overpass_bbox});')
-                query_parts.append(f'way["tourism"]({overpass_bbox});')
-                query_parts.append(f'way["leisure"]({overpass_bbox});')
-                query_parts.append(f'way["healthcare"]({overpass_bbox});')
-                query_parts.append(f'way["office"]({overpass_bbox});')
-                query_parts.append(f'way["government"]({overpass_bbox});')
-            
-            if not query_parts:
+            template = _query_template(frozenset(layers))
+            if not template:
                 return self._create_empty_response(bbox)
             
-            # Build complete query
-            query = f"""
-            [out:json][timeout:25];
-            (
-              {' '.join(query_parts)}
-            );
-            out geom;
-            """
-            
-            # Make request to Overpass API
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.overpass_url, data=query)
-                response.raise_for_status()
-                data = response.json()
+            area = (bbox["max_lon"] - bbox["min_lon"]) * (bbox["max_lat"] - bbox["min_lat"])
+            if area > TILE_AREA_THRESHOLD:
+                # Large area: query tiles concurrently and merge, dropping
+                # ways/nodes returned by more than one tile. Tiles that fail
+                # are skipped so one 429 doesn't throw away the rest
+                tile_data = await asyncio.gather(
+                    *(self._fetch_tile(tile, template) for tile in _tile(bbox)),
+                    return_exceptions=True
+                )
+                failures = [t for t in tile_data if isinstance(t, Exception)]
+                if len(failures) == len(tile_data):
+                    raise failures[0]
+                for failure in failures:
+                    print(f"Error fetching OSM tile: {failure}")
+                elements = []
+                seen = set()
+                for tile in tile_data:
+                    if isinstance(tile, Exception):
+                        continue
+                    for element in tile.get("elements", []):
+                        key = (element["type"], element["id"])
+                        if key not in seen:
+                            seen.add(key)
+                            elements.append(element)
+                data = {"elements": elements}
+            else:
+                data = await self._fetch_tile(bbox, template)
             
             # Process the data
             return self._process_osm_data(data, bbox, layers)
@@ -69,6 +214,21 @@ class RealOSMExtractor:
             print(f"Error extracting OSM data: {e}")
             return self._create_empty_response(bbox)
     
+    async def _fetch_tile(self, bbox: Dict[str, float], template: str) -> Dict[str, Any]:
+        """Run the Overpass query for one bbox and return the parsed JSON"""
+        # Convert bbox to overpass format
+        overpass_bbox = f"{bbox['min_lat']},{bbox['min_lon']},{bbox['max_lat']},{bbox['max_lon']}"
+        query = template.format(bbox=overpass_bbox)
+        
+        # Make request to Overpass API
+        client = await self._get_client()
+        async with self._get_semaphore(), client.stream("POST", self.overpass_url, data=query, headers={"Accept-Encoding": "gzip, deflate"}) as response:
+            response.raise_for_status()
+            body = await response.aread()
+        
+        # Parse off the event loop; Overpass responses can be several MB
+        return await asyncio.to_thread(orjson.loads, body)
+    
     def _process_osm_data(self, data: Dict, bbox: Dict[str, float], layers: List[str]) -> Dict[str, Any]:
         """Process raw OSM data into GeoJSON format"""
         elements = data.get("elements", [])
@@ -85,123 +245,62 @@ class RealOSMExtractor:
             "layers": {}
         }
         
-        # Process elements by type
-        roads = []
-        buildings = []
-        amenities = []
-        pois = {}
+        want_roads = "roads" in layers
+        want_buildings = "buildings" in layers
+        want_pois = "amenities" in layers or "pois" in layers
+        
+        # Split elements into typed buckets first. A way goes to the first
+        # requested layer whose tag it carries: roads, then buildings, then POIs
+        ways = [e for e in elements if e["type"] == "way" and e.get("geometry")]
+        nodes = [e for e in elements if e["type"] == "node"] if want_pois else []
+        
+        if want_roads:
+            road_ways = [e for e in ways if "highway" in (e.get("tags") or {})]
+            ways = [e for e in ways if "highway" not in (e.get("tags") or {})]
+        else:
+            road_ways = []
+        if want_buildings:
+            building_ways = [e for e in ways if "building" in (e.get("tags") or {})]
+            ways = [e for e in ways if "building" not in (e.get("tags") or {})]
+        else:
+            building_ways = []
+        poi_ways = [e for e in ways if not POI_TAG_KEYS.isdisjoint(e.get("tags") or {})] if want_pois else []
         
-        for element in elements:
-            if element["type"] == "way":
-                if "geometry" in element and element["geometry"]:
-                    coords = element["geometry"]["coordinates"]
-                    tags = element.get("tags", {})
-                    
-                    if "highway" in tags and "roads" in layers:
-                        # Road
-                        if len(coords) >= 2:
-                            road_feature = {
-                                "type": "Feature",
-                                "geometry": {
-                                    "type": "LineString",
-                                    "coordinates": coords
-                                },
-                                "properties": {
-                                    "id": element["id"],
-                                    "highway": tags.get("highway", "unknown"),
-                                    "name": tags.get("name", ""),
-                                    "oneway": tags.get("oneway", "no")
-                                }
-                            }
-                            roads.append(road_feature)
-                    
-                    elif "building" in tags and "buildings" in layers:
-                        # Building
-                        if len(coords) >= 3:
-                            # Close polygon if not already closed
-                            if coords[0] != coords[-1]:
-                                coords.append(coords[0])
-                            
-                            building_feature = {
-                                "type": "Feature",
-                                "geometry": {
-                                    "type": "Polygon",
-                                    "coordinates": [coords]
-                                },
-                                "properties": {
-                                    "id": element["id"],
-                                    "building": tags.get("building", "yes"),
-                                    "name": tags.get("name", "")
-                                }
-                            }
-                            buildings.append(building_feature)
-                    
-                    elif any(tag in tags for tag in ["amenity", "shop", "tourism", "leisure", "healthcare", "office", "government"]) and ("amenities" in layers or "pois" in layers):
-                        # POI/Amenity
-                        poi_class = self._classify_poi(tags)
-                        if poi_class not in pois:
-                            pois[poi_class] = []
-                        
-                        # Convert way to point (centroid)
-                        if len(coords) >= 3:
-                            # Calculate centroid
-                            lats = [coord[1] for coord in coords]
-                            lons = [coord[0] for coord in coords]
-                            center_lat = sum(lats) / len(lats)
-                            center_lon = sum(lons) / len(lons)
-                            
-                            poi_feature = {
-                                "type": "Feature",
-                                "geometry": {
-                                    "type": "Point",
-                                    "coordinates": [center_lon, center_lat]
-                                },
-                                "properties": {
-                                    "id": element["id"],
-                                    "name": tags.get("name", ""),
-                                    "amenity": tags.get("amenity", ""),
-                                    "shop": tags.get("shop", ""),
-                                    "tourism": tags.get("tourism", ""),
-                                    "leisure": tags.get("leisure", ""),
-                                    "healthcare": tags.get("healthcare", ""),
-                                    "office": tags.get("office", ""),
-                                    "government": tags.get("government", ""),
-                                    "class": poi_class
-                                }
-                            }
-                            pois[poi_class].append(poi_feature)
+        # Materialize features per bucket
+        road_coords = [e["geometry"]["coordinates"] for e in road_ways if len(e["geometry"]["coordinates"]) >= 2]
+        roads = [self._make_road(e) for e in road_ways if len(e["geometry"]["coordinates"]) >= 2]
+        buildings = [self._make_building(e) for e in building_ways if len(e["geometry"]["coordinates"]) >= 3]
+        
+        # Way POIs get their centroid filled in below in one batch
+        way_coords = [e["geometry"]["coordinates"] for e in poi_ways if len(e["geometry"]["coordinates"]) >= 3]
+        way_pois = []
+        pois = defaultdict(list)
+        for element in poi_ways:
+            if len(element["geometry"]["coordinates"]) >= 3:
+                poi_class = self._classify_poi(element.get("tags") or {})
+                poi_feature = self._make_poi(element, None, poi_class)
+                way_pois.append(poi_feature)
+                pois[poi_class].append(poi_feature)
+        
+        for element in nodes:
+            # Node POI; untagged geometry helper nodes are skipped outright
+            tags = element.get("tags")
+            if not tags or "lat" not in element or "lon" not in element:
+                continue
             
-            elif element["type"] == "node" and ("amenities" in layers or "pois" in layers):
-                # Node POI
-                if "lat" in element and "lon" in element:
-                    coords = [element["lon"], element["lat"]]
-                    tags = element.get("tags", {})
-                
-                if any(tag in tags for tag in ["amenity", "shop", "tourism", "leisure", "healthcare", "office", "government"]):
-                    poi_class = self._classify_poi(tags)
-                    if poi_class not in pois:
-                        pois[poi_class] = []
-                    
-                    poi_feature = {
-                        "type": "Feature",
-                        "geometry": {
-                            "type": "Point",
-                            "coordinates": coords
-                        },
-                        "properties": {
-                            "id": element["id"],
-                            "name": tags.get("name", ""),
-                            "amenity": tags.get("amenity", ""),
-                            "shop": tags.get("shop", ""),
-                            "tourism": tags.get("tourism", ""),
-                            "leisure": tags.get("leisure", ""),
-                            "healthcare": tags.get("healthcare", ""),
-                            "office": tags.get("office", ""),
-                            "government": tags.get("government", ""),
-                            "class": poi_class
-                        }
-                    }
-                    pois[poi_class].append(poi_feature)
+            if not POI_TAG_KEYS.isdisjoint(tags):
+                poi_class = self._classify_poi(tags)
+                pois[poi_class].append(self._make_poi(element, [element["lon"], element["lat"]], poi_class))
+        
+        # Calculate way POI centroids
+        if way_pois:
+            counts = np.fromiter((len(c) for c in way_coords), dtype=np.intp, count=len(way_coords))
+            offsets = np.zeros(len(counts), dtype=np.intp)
+            np.cumsum(counts[:-1], out=offsets[1:])
+            flat = np.asarray([coord for c in way_coords for coord in c], dtype=np.float64)
+            centers = np.add.reduceat(flat, offsets, axis=0) / counts[:, None]
+            for poi_feature, center in zip(way_pois, centers.tolist()):
+                poi_feature.coords = center
         
         # Build response
         if "roads" in layers:
@@ -209,7 +308,7 @@ class RealOSMExtractor:
                 "type": "FeatureCollection",
                 "features": roads
             }
-            result["summary"]["roads_km"] = len(roads) * 0.1  # Rough estimate
+            result["summary"]["roads_km"] = _total_length_km(road_coords) if road_coords else 0
         
         if "buildings" in layers:
             result["layers"]["buildings"] = {
@@ -239,31 +338,51 @@ class RealOSMExtractor:
         
         return result
     
+    def _make_road(self, element: Dict[str, Any]) -> OSMFeature:
+        """Build a road LineString feature from an Overpass way"""
+        tags = element.get("tags") or {}
+        return OSMFeature("LineString", element["geometry"]["coordinates"], (
+            ("id", element["id"]),
+            ("highway", tags.get("highway", "unknown")),
+            ("name", tags.get("name", "")),
+            ("oneway", tags.get("oneway", "no"))
+        ))
+    
+    def _make_building(self, element: Dict[str, Any]) -> OSMFeature:
+        """Build a building Polygon feature from an Overpass way"""
+        tags = element.get("tags") or {}
+        coords = element["geometry"]["coordinates"]
+        # Close polygon if not already closed, without mutating the parsed list
+        ring = coords if coords[0] == coords[-1] else [*coords, coords[0]]
+        return OSMFeature("Polygon", ring, (
+            ("id", element["id"]),
+            ("building", tags.get("building", "yes")),
+            ("name", tags.get("name", ""))
+        ))
+    
+    def _make_poi(self, element: Dict[str, Any], coords: Optional[List[float]], poi_class: str) -> OSMFeature:
+        """Build a classified POI Point feature"""
+        tags = element.get("tags") or {}
+        # Only carry the POI tags the element actually has
+        return OSMFeature("Point", coords, (
+            ("id", element["id"]),
+            ("name", tags.get("name", "")),
+            ("class", poi_class),
+            *((key, tags[key]) for key in POI_TAGS if tags.get(key))
+        ))
+    
     def _classify_poi(self, tags: Dict[str, str]) -> str:
         """Classify POI into categories"""
-        classification_rules = {
-            "Retail/Trade": ["shop", "amenity=marketplace", "amenity=mall"],
-            "Government": ["amenity=townhall", "amenity=courthouse", "amenity=embassy", "office=government", "government"],
-            "Education": ["amenity=school", "amenity=college", "amenity=university", "amenity=kindergarten", "amenity=library"],
-            "Health": ["amenity=hospital", "amenity=clinic", "amenity=doctors", "amenity=dentist", "amenity=pharmacy", "healthcare"],
-            "Transport": ["amenity=bus_station", "amenity=ferry_terminal", "amenity=bicycle_parking", "public_transport", "railway", "aeroway=terminal"],
-            "Culture/Leisure": ["amenity=theatre", "amenity=cinema", "amenity=arts_centre", "tourism=museum", "tourism=attraction", "leisure"],
-            "Hospitality": ["tourism=hotel", "tourism=guest_house", "tourism=motel", "tourism=hostel", "amenity=restaurant", "amenity=cafe", "amenity=fast_food", "amenity=bar", "amenity=pub"],
-            "Finance": ["amenity=bank", "amenity=atm", "amenity=bureau_de_change"],
-            "Services": ["amenity=post_office", "amenity=police", "amenity=fire_station", "amenity=car_rental", "amenity=car_wash", "office"],
-            "Religious": ["amenity=place_of_worship", "religion"]
-        }
-        
-        for category, rules in classification_rules.items():
-            for rule in rules:
-                if "=" in rule:
-                    key, value = rule.split("=", 1)
-                    if tags.get(key) == value:
-                        return category
-                elif rule in tags:
-                    return category
+        best = None
+        for key, value in tags.items():
+            hit = self._eq_rules.get((key, value))
+            if hit is not None and (best is None or hit < best):
+                best = hit
+            hit = self._presence_rules.get(key)
+            if hit is not None and (best is None or hit < best):
+                best = hit
         
-        return "Other"
+        return best[1] if best is not None else "Other"
     
     def _create_empty_response(self, bbox: Dict[str, float]) -> Dict[str, Any]:
         """Create empty response when no data is found"""
@@ -297,6 +416,7 @@ async def test_extractor():
     }
     
     result = await extractor.extract_data(bbox, ["roads", "buildings", "amenities"])
+    await extractor.aclose()
     print(f"Found {len(result['layers']['roads']['features'])} roads")
     print(f"Found {len(result['layers']['buildings']['features'])} buildings")
     print(f"Found {len(result['layers']['amenities']['features'])} amenities")
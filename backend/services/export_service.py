@@ -1,11 +1,16 @@
 import asyncio
 import os
-import json
 from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime
 import httpx
 from playwright.async_api import async_playwright
+try:
+    from weasyprint import CSS, HTML
+except (ImportError, OSError):
+    # Fall back to rendering PDFs with headless Chromium (OSError is raised
+    # when the Pango/GObject system libraries are missing)
+    CSS = HTML = None
 from pptx import Presentation
 from pptx.util import Inches
 from PIL import Image
@@ -13,36 +18,71 @@ import io
 
 from models.schemas import ExportPDFRequest, ExportPPTXRequest
 
+LAYER_SLIDE_TITLES = {
+    "roads": "Ճանապարհային ցանց / Road Network",
+    "buildings": "Շենքեր / Buildings",
+    "amenities": "Հարմարություններ / Amenities",
+    "pois": "Հետաքրքրության կետեր / Points of Interest",
+}
+
 class ExportService:
     def __init__(self):
         self.export_dir = Path("exports")
         self.export_dir.mkdir(exist_ok=True)
         self.template_dir = Path("export/templates")
         self.template_dir.mkdir(parents=True, exist_ok=True)
+        # Slide map images are read once and reused for every PPTX export
+        self._placeholders = {
+            name: self._load_placeholder(name) for name in LAYER_SLIDE_TITLES
+        }
+        # Chromium is launched once and shared by all PDF exports
+        self._pw = None
+        self._browser = None
+        self._browser_lock = asyncio.Lock()
+    
+    async def _get_browser(self):
+        """Return the shared Chromium instance, launching it on first use"""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._pw is None:
+                    self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch()
+            return self._browser
+    
+    async def aclose(self):
+        """Shut down the shared browser"""
+        async with self._browser_lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._pw is not None:
+                await self._pw.stop()
+                self._pw = None
     
     async def export_pdf(self, request: ExportPDFRequest) -> str:
-        """Export map data as PDF using Playwright"""
+        """Export map data as PDF using WeasyPrint, or Playwright if it is not installed"""
         filename = f"context_maps_{self._sanitize_filename(request.title)}_{datetime.now().strftime('%Y%m%d')}.pdf"
         file_path = self.export_dir / filename
         
         # Create HTML template for PDF export
         html_content = await self._create_pdf_html(request)
         
-        # Save HTML template
-        template_path = self.template_dir / f"pdf_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        with open(template_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        if HTML is not None:
+            # Render in-process; no browser launch or temp file needed
+            await asyncio.to_thread(self._write_pdf, html_content, file_path)
+            return str(file_path)
         
-        # Generate PDF using Playwright
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        # Generate PDF using Playwright, in a fresh context on the shared browser
+        browser = await self._get_browser()
+        context = await browser.new_context()
+        try:
+            page = await context.new_page()
             
-            # Load the HTML template
-            await page.goto(f"file://{template_path.absolute()}")
+            # Load the HTML directly; no temp file on disk
+            await page.set_content(html_content, wait_until='load')
             
-            # Wait for map to load
-            await page.wait_for_timeout(3000)
+            # Wait until the page reports the map as drawn
+            await page.wait_for_function("window.__mapReady === true", timeout=10000)
             
             # Generate PDF
             await page.pdf(
@@ -51,19 +91,30 @@ class ExportService:
                 print_background=True,
                 margin={'top': '0.5in', 'bottom': '0.5in', 'left': '0.5in', 'right': '0.5in'}
             )
-            
-            await browser.close()
-        
-        # Clean up template
-        template_path.unlink()
+        finally:
+            await context.close()
         
         return str(file_path)
     
+    def _write_pdf(self, html_content: str, file_path: Path):
+        """Render HTML to an A4 PDF with WeasyPrint (blocking)"""
+        page_css = CSS(string="@page { size: A4; margin: 0.5in; }")
+        HTML(string=html_content, base_url=str(self.template_dir)).write_pdf(
+            str(file_path), stylesheets=[page_css]
+        )
+    
     async def export_pptx(self, request: ExportPPTXRequest) -> str:
         """Export map data as PowerPoint presentation"""
         filename = f"context_maps_{self._sanitize_filename(request.title)}_{datetime.now().strftime('%Y%m%d')}.pptx"
         file_path = self.export_dir / filename
         
+        # Building and saving the deck is all blocking work; keep it off the event loop
+        await asyncio.to_thread(self._build_pptx_sync, request, file_path)
+        
+        return str(file_path)
+    
+    def _build_pptx_sync(self, request: ExportPPTXRequest, file_path: Path):
+        """Assemble the presentation and write it to file_path"""
         # Create new presentation
         prs = Presentation()
         
@@ -79,19 +130,10 @@ class ExportService:
         
         # Add content for each layer
         for layer in request.layers:
-            if layer == "roads":
-                await self._add_roads_slide(prs, request)
-            elif layer == "buildings":
-                await self._add_buildings_slide(prs, request)
-            elif layer == "amenities":
-                await self._add_amenities_slide(prs, request)
-            elif layer == "pois":
-                await self._add_pois_slide(prs, request)
+            if layer in LAYER_SLIDE_TITLES:
+                self._add_layer_slide(prs, layer)
         
-        # Save presentation
         prs.save(str(file_path))
-        
-        return str(file_path)
     
     async def _create_pdf_html(self, request: ExportPDFRequest) -> str:
         """Create HTML template for PDF export"""
@@ -178,27 +220,20 @@ class ExportService:
                 <p>Տվյալներ OpenStreetMap-ից / Data from OpenStreetMap</p>
                 <p>Գեներացվել է OSM Map Exporter-ով / Generated by OSM Map Exporter</p>
             </div>
+            
+            <script>
+                // Readiness signal for the PDF renderer; map drawing code
+                // should set this from its idle handler once tiles are drawn
+                window.__mapReady = true;
+            </script>
         </body>
         </html>
         """
     
-    async def _add_roads_slide(self, prs: Presentation, request: ExportPPTXRequest):
-        """Add roads layer slide to presentation"""
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = "Ճանապարհային ցանց / Road Network"
-        
-        # Add map image placeholder
-        left = Inches(1)
-        top = Inches(2)
-        width = Inches(8)
-        height = Inches(5)
-        
-        slide.shapes.add_picture("placeholder_roads.png", left, top, width, height)
-    
-    async def _add_buildings_slide(self, prs: Presentation, request: ExportPPTXRequest):
-        """Add buildings layer slide to presentation"""
+    def _add_layer_slide(self, prs: Presentation, layer: str):
+        """Add a layer slide with its map image to the presentation"""
         slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = "Շենքեր / Buildings"
+        slide.shapes.title.text = LAYER_SLIDE_TITLES[layer]
         
         # Add map image placeholder
         left = Inches(1)
@@ -206,33 +241,16 @@ class ExportService:
         width = Inches(8)
         height = Inches(5)
         
-        slide.shapes.add_picture("placeholder_buildings.png", left, top, width, height)
+        slide.shapes.add_picture(io.BytesIO(self._placeholders[layer]), left, top, width, height)
     
-    async def _add_amenities_slide(self, prs: Presentation, request: ExportPPTXRequest):
-        """Add amenities layer slide to presentation"""
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = "Հարմարություններ / Amenities"
-        
-        # Add map image placeholder
-        left = Inches(1)
-        top = Inches(2)
-        width = Inches(8)
-        height = Inches(5)
-        
-        slide.shapes.add_picture("placeholder_amenities.png", left, top, width, height)
-    
-    async def _add_pois_slide(self, prs: Presentation, request: ExportPPTXRequest):
-        """Add POIs layer slide to presentation"""
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = "Հետաքրքրության կետեր / Points of Interest"
-        
-        # Add map image placeholder
-        left = Inches(1)
-        top = Inches(2)
-        width = Inches(8)
-        height = Inches(5)
-        
-        slide.shapes.add_picture("placeholder_pois.png", left, top, width, height)
+    def _load_placeholder(self, name: str) -> bytes:
+        """Read a layer's placeholder PNG, or render a blank one if it's missing"""
+        path = self.template_dir / f"placeholder_{name}.png"
+        if path.exists():
+            return path.read_bytes()
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 500), (230, 230, 230)).save(buffer, format="PNG")
+        return buffer.getvalue()
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for safe file system usage"""
@@ -1,43 +1,114 @@
 import httpx
-import json
+import orjson
 import asyncio
-from typing import Dict, List, Optional, Any, Tuple
+import gzip
+import hashlib
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from typing import Dict, List, Any
 import geopandas as gpd
-from shapely.geometry import Point, LineString, Polygon
-from shapely.ops import transform
 import pyproj
-from functools import partial
 import osmnx as ox
+from cachetools import TTLCache
 from .overpass_queries import OverpassQueries
 
+@dataclass(slots=True)
+class RawFeature:
+    """Compact road/building record, turned into a GeoJSON Feature only when serialized"""
+    id: int
+    kind: str  # "LineString" or "Polygon"
+    coords: List[List[float]]  # line vertices, or the closed outer ring
+    tags: Tuple[Tuple[str, str], ...]
+    length_m: Optional[float] = None
+    area_m2: Optional[float] = None
+
+def _to_geojson(raw: RawFeature) -> Dict[str, Any]:
+    """Materialize a RawFeature as a GeoJSON Feature dict"""
+    properties = {"id": raw.id, **dict(raw.tags)}
+    if raw.length_m is not None:
+        properties["length_m"] = raw.length_m
+    if raw.area_m2 is not None:
+        properties["area_m2"] = raw.area_m2
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": raw.kind,
+            "coordinates": raw.coords if raw.kind == "LineString" else [raw.coords]
+        },
+        "properties": properties
+    }
+
 class OSMExtractor:
     def __init__(self):
         self.overpass_url = "https://overpass-api.de/api/interpreter"
         self.queries = OverpassQueries()
+        # Processed extract results keyed by (rounded bbox, sorted layers)
+        self._cache = TTLCache(maxsize=128, ttl=600)
+        # WGS84 -> Web Mercator projection, built once instead of per geometry
+        self._to_mercator = pyproj.Transformer.from_crs('EPSG:4326', 'EPSG:3857', always_xy=True).transform
+        # Building areas are measured geodesically; Mercator inflates them away from the equator
+        self._geod = pyproj.Geod(ellps='WGS84')
+        # Shared keep-alive client; Overpass is fragile, so cap concurrent queries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._overpass_sem = asyncio.Semaphore(2)
+        # Raw Overpass responses cached on disk by bbox and query text, capped in count
+        self._overpass_cache_dir = Path("exports") / ".cache"
+        self._overpass_cache_dir.mkdir(parents=True, exist_ok=True)
+        self._overpass_cache_ttl = 24 * 60 * 60
+        self._overpass_cache_max_files = 512
         
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                # Overpass JSON compresses ~5-10x; httpx decodes transparently
+                headers={"Accept-Encoding": "gzip, deflate"},
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True,
+                    retries=2,
+                    limits=httpx.Limits(max_connections=4)
+                )
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def extract_data(
         self, 
         bbox: Optional[Dict] = None, 
         polygon: Optional[str] = None,
         layers: List[str] = None
     ) -> Dict[str, Any]:
-        """Extract OSM data for specified area and layers"""
+        """Extract OSM data for specified area and layers
+        
+        Roads and buildings features are RawFeature records rather than dicts;
+        serialize the result with encode_geojson.
+        """
         if layers is None:
             layers = ["roads", "buildings", "amenities", "pois"]
             
         # Determine bounding box
         if polygon:
             # Parse GeoJSON polygon and get bbox
-            poly_data = json.loads(polygon)
-            coords = poly_data["coordinates"][0]
-            lons = [coord[0] for coord in coords]
-            lats = [coord[1] for coord in coords]
+            poly_data = orjson.loads(polygon)
+            coords = np.asarray(poly_data["coordinates"][0], dtype=np.float64)[:, :2]
+            mn = coords.min(axis=0)
+            mx = coords.max(axis=0)
             bbox = {
-                "min_lon": min(lons),
-                "min_lat": min(lats),
-                "max_lon": max(lons),
-                "max_lat": max(lats)
+                "min_lon": float(mn[0]),
+                "min_lat": float(mn[1]),
+                "max_lon": float(mx[0]),
+                "max_lat": float(mx[1])
             }
         
         if not bbox:
@@ -48,70 +119,187 @@ class OSMExtractor:
         if hasattr(bbox, 'min_lat'):
             # Pydantic model
             overpass_bbox = f"{bbox.min_lat},{bbox.min_lon},{bbox.max_lat},{bbox.max_lon}"
+            bbox_values = (bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat)
         else:
             # Dictionary
             overpass_bbox = f"{bbox['min_lat']},{bbox['min_lon']},{bbox['max_lat']},{bbox['max_lon']}"
+            bbox_values = (bbox['min_lon'], bbox['min_lat'], bbox['max_lon'], bbox['max_lat'])
+        
+        cache_key = (*(round(v, 4) for v in bbox_values), tuple(sorted(layers)))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return self._copy_result(cached)
         
         # Extract data for each layer
         results = {}
         summary = {}
+        failed = False
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            tasks = []
+        client = await self._get_client()
+        tasks = []
             
-            if "roads" in layers:
-                tasks.append(self._extract_roads(client, overpass_bbox))
-            if "buildings" in layers:
-                tasks.append(self._extract_buildings(client, overpass_bbox))
-            if "amenities" in layers:
-                tasks.append(self._extract_amenities(client, overpass_bbox))
-            if "pois" in layers:
-                tasks.append(self._extract_pois(client, overpass_bbox))
+        if "roads" in layers:
+            tasks.append(self._extract_roads(client, overpass_bbox, bbox_values))
+        if "buildings" in layers:
+            tasks.append(self._extract_buildings(client, overpass_bbox, bbox_values))
+        # Amenities and POIs come from the same Overpass query; run it once
+        if "amenities" in layers or "pois" in layers:
+            tasks.append(self._extract_amenities(client, overpass_bbox, bbox_values))
                 
-            # Execute all queries in parallel
-            layer_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Execute all queries in parallel
+        layer_results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            # Process results
-            for i, result in enumerate(layer_results):
-                if isinstance(result, Exception):
-                    print(f"Error extracting layer {i}: {result}")
-                    continue
+        # Process results
+        for i, result in enumerate(layer_results):
+            if isinstance(result, Exception):
+                print(f"Error extracting layer {i}: {result}")
+                failed = True
+                continue
                     
-                if isinstance(result, tuple) and len(result) == 3:
-                    layer_name, features, stats = result
-                else:
-                    print(f"Unexpected result format: {result}")
-                    continue
-                results[layer_name] = {
-                    "type": "FeatureCollection",
-                    "features": features
-                }
+            if isinstance(result, tuple) and len(result) == 3:
+                layer_name, features, stats = result
+            else:
+                print(f"Unexpected result format: {result}")
+                continue
                 
-                if layer_name == "roads":
-                    summary["roads_km"] = stats.get("total_length_km", 0)
-                elif layer_name == "buildings":
-                    summary["buildings_n"] = stats.get("count", 0)
-                elif layer_name == "amenities":
+            if layer_name == "amenities":
+                # Shared by the amenities and pois layers
+                if "amenities" in layers:
+                    results["amenities"] = {
+                        "type": "FeatureCollection",
+                        "features": features
+                    }
                     summary["amenities_n"] = stats.get("count", 0)
-                elif layer_name == "pois":
-                    summary["poi_n_by_class"] = stats.get("count_by_class", {})
+                if "pois" in layers:
+                    results["pois"] = {
+                        "type": "FeatureCollection",
+                        "features": features
+                    }
+                continue
+                
+            results[layer_name] = {
+                "type": "FeatureCollection",
+                "features": features
+            }
+                
+            if layer_name == "roads":
+                summary["roads_km"] = stats.get("total_length_km", 0)
+            elif layer_name == "buildings":
+                summary["buildings_n"] = stats.get("count", 0)
         
-        return {
+        result = {
             "bbox": bbox,
             "crs": "EPSG:4326",
             "summary": summary,
             "layers": results
         }
+        # Don't pin a partial result when a layer query failed
+        if not failed:
+            self._cache[cache_key] = result
+        return self._copy_result(result)
+    
+    def clear_cache(self, key: Optional[str] = None) -> int:
+        """Clear cached results, optionally only those for a "min_lon,min_lat,max_lon,max_lat" bbox
+        
+        Both the in-memory results and the raw Overpass responses on disk are
+        dropped, so the next extract for the bbox goes back to Overpass.
+        """
+        if key is None:
+            cleared = len(self._cache)
+            self._cache.clear()
+            return cleared + self._purge_overpass_cache("*.json.gz")
+        
+        bbox_values = tuple(round(float(v), 4) for v in key.split(","))
+        if len(bbox_values) != 4:
+            raise ValueError("Cache key must be 'min_lon,min_lat,max_lon,max_lat'")
+        stale = [k for k in self._cache if k[:4] == bbox_values]
+        for k in stale:
+            self._cache.pop(k, None)
+        return len(stale) + self._purge_overpass_cache(f"{self._disk_cache_prefix(bbox_values)}-*.json.gz")
+    
+    def _purge_overpass_cache(self, pattern: str) -> int:
+        """Delete cached Overpass responses matching a glob pattern"""
+        purged = 0
+        for path in self._overpass_cache_dir.glob(pattern):
+            try:
+                path.unlink()
+                purged += 1
+            except OSError:
+                pass
+        return purged
+    
+    @staticmethod
+    def _disk_cache_prefix(bbox_values: Tuple[float, ...]) -> str:
+        """File name prefix for a (min_lon, min_lat, max_lon, max_lat) bbox, rounded like the result cache key"""
+        return "_".join(f"{round(v, 4):.4f}" for v in bbox_values)
+    
+    def _copy_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the top-level result so callers can replace layers without touching the cache"""
+        return {**result, "summary": dict(result["summary"]), "layers": dict(result["layers"])}
+    
+    async def _overpass_post(self, client: httpx.AsyncClient, query: str, bbox_values: Tuple[float, ...]) -> Dict[str, Any]:
+        """POST a query to Overpass and parse the JSON body, using the disk cache when fresh"""
+        # Files are prefixed with the bbox so clear_cache can find them by key
+        prefix = self._disk_cache_prefix(bbox_values)
+        cache_path = self._overpass_cache_dir / f"{prefix}-{hashlib.sha1(query.encode()).hexdigest()}.json.gz"
+        cached = await asyncio.to_thread(self._read_overpass_cache, cache_path)
+        if cached is not None:
+            return cached
+        
+        async with self._overpass_sem:
+            async with client.stream("POST", self.overpass_url, data=query) as response:
+                response.raise_for_status()
+                body = await response.aread()
+        
+        # Parse with orjson in a worker thread; city-sized responses are
+        # tens of MB and would otherwise stall the event loop
+        data = await asyncio.to_thread(orjson.loads, body)
+        await asyncio.to_thread(self._write_overpass_cache, cache_path, body)
+        return data
     
-    async def _extract_roads(self, client: httpx.AsyncClient, bbox: str) -> Tuple[str, List[Dict], Dict]:
+    def _read_overpass_cache(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Load a cached Overpass response if it exists and is within the TTL; expired files are deleted"""
+        try:
+            if time.time() - path.stat().st_mtime > self._overpass_cache_ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return orjson.loads(gzip.decompress(path.read_bytes()))
+        except (OSError, EOFError, orjson.JSONDecodeError):
+            return None
+    
+    def _write_overpass_cache(self, path: Path, body: bytes):
+        """Store a raw Overpass response; written to a temp file then renamed into place"""
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(gzip.compress(body, compresslevel=1))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write Overpass cache {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+        self._sweep_overpass_cache()
+    
+    def _sweep_overpass_cache(self):
+        """Delete expired cache files, then the oldest ones beyond the file cap"""
+        now = time.time()
+        entries = []
+        for path in self._overpass_cache_dir.iterdir():
+            try:
+                mtime = path.stat().st_mtime
+                if now - mtime > self._overpass_cache_ttl:
+                    path.unlink()
+                elif path.name.endswith(".json.gz"):
+                    entries.append((mtime, path))
+            except OSError:
+                pass
+        entries.sort()
+        for _, path in entries[:-self._overpass_cache_max_files]:
+            path.unlink(missing_ok=True)
+    
+    async def _extract_roads(self, client: httpx.AsyncClient, bbox: str, bbox_values: Tuple[float, ...]) -> Tuple[str, List[RawFeature], Dict]:
         """Extract road network data"""
         query = self.queries.get_roads_query(bbox)
-        response = await client.post(self.overpass_url, data=query)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._overpass_post(client, query, bbox_values)
         features = []
-        total_length = 0
         
         for element in data.get("elements", []):
             if element["type"] == "way" and "geometry" in element:
@@ -123,39 +311,27 @@ class OSMExtractor:
                     coords = geometry_data.get("coordinates", [])
                 
                 if len(coords) >= 2:
-                    # Create LineString geometry
-                    geometry = LineString(coords)
-                    
-                    # Calculate length in meters
-                    length_m = self._calculate_length(geometry)
-                    total_length += length_m
-                    
-                    # Create feature
-                    feature = {
-                        "type": "Feature",
-                        "geometry": {
-                            "type": "LineString",
-                            "coordinates": coords
-                        },
-                        "properties": {
-                            "id": element["id"],
-                            "highway": element.get("tags", {}).get("highway", "unknown"),
-                            "name": element.get("tags", {}).get("name", ""),
-                            "length_m": length_m,
-                            "oneway": element.get("tags", {}).get("oneway", "no")
-                        }
-                    }
-                    features.append(feature)
+                    # length_m is filled in after the loop
+                    tags = element.get("tags", {})
+                    features.append(RawFeature(element["id"], "LineString", coords, (
+                        ("highway", tags.get("highway", "unknown")),
+                        ("name", tags.get("name", "")),
+                        ("oneway", tags.get("oneway", "no"))
+                    )))
+        
+        total_length = 0.0
+        if features:
+            lengths = self._batch_lengths([f.coords for f in features])
+            for feature, length_m in zip(features, lengths.tolist()):
+                feature.length_m = length_m
+            total_length = float(lengths.sum())
         
         return "roads", features, {"total_length_km": total_length / 1000}
     
-    async def _extract_buildings(self, client: httpx.AsyncClient, bbox: str) -> Tuple[str, List[Dict], Dict]:
+    async def _extract_buildings(self, client: httpx.AsyncClient, bbox: str, bbox_values: Tuple[float, ...]) -> Tuple[str, List[RawFeature], Dict]:
         """Extract building data"""
         query = self.queries.get_buildings_query(bbox)
-        response = await client.post(self.overpass_url, data=query)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._overpass_post(client, query, bbox_values)
         features = []
         
         for element in data.get("elements", []):
@@ -172,40 +348,36 @@ class OSMExtractor:
                     if coords[0] != coords[-1]:
                         coords.append(coords[0])
                     
-                    geometry = Polygon(coords)
-                    
-                    # Calculate area
-                    area_m2 = self._calculate_area(geometry)
-                    
-                    feature = {
-                        "type": "Feature",
-                        "geometry": {
-                            "type": "Polygon",
-                            "coordinates": [coords]
-                        },
-                        "properties": {
-                            "id": element["id"],
-                            "building": element.get("tags", {}).get("building", "yes"),
-                            "name": element.get("tags", {}).get("name", ""),
-                            "area_m2": area_m2,
-                            "levels": element.get("tags", {}).get("building:levels", "")
-                        }
-                    }
-                    features.append(feature)
+                    # area_m2 is filled in after the loop
+                    tags = element.get("tags", {})
+                    features.append(RawFeature(element["id"], "Polygon", coords, (
+                        ("building", tags.get("building", "yes")),
+                        ("name", tags.get("name", "")),
+                        ("levels", tags.get("building:levels", ""))
+                    )))
+        
+        if features:
+            areas = self._batch_areas([f.coords for f in features])
+            for feature, area_m2 in zip(features, areas.tolist()):
+                feature.area_m2 = area_m2
         
         return "buildings", features, {"count": len(features)}
     
-    async def _extract_amenities(self, client: httpx.AsyncClient, bbox: str) -> Tuple[str, List[Dict], Dict]:
+    async def _extract_amenities(self, client: httpx.AsyncClient, bbox: str, bbox_values: Tuple[float, ...]) -> Tuple[str, List[Dict], Dict]:
         """Extract amenity data"""
         query = self.queries.get_amenities_query(bbox)
-        response = await client.post(self.overpass_url, data=query)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._overpass_post(client, query, bbox_values)
         features = []
         
         for element in data.get("elements", []):
-            if element["type"] in ["node", "way"] and "geometry" in element:
+            if element["type"] == "way" and "center" in element:
+                # Overpass already computed the way's center ("out center")
+                center = element["center"]
+                coords = [center["lon"], center["lat"]]
+            elif element["type"] == "node" and "lat" in element:
+                # Plain "out" nodes carry their position inline
+                coords = [element["lon"], element["lat"]]
+            elif element["type"] in ["node", "way"] and "geometry" in element:
                 # Convert geometry from [{'lat': x, 'lon': y}] to [[lon, lat]]
                 geometry_data = element["geometry"]
                 if isinstance(geometry_data, list):
@@ -215,57 +387,114 @@ class OSMExtractor:
                 
                 # For points, use the first coordinate; for ways, use centroid
                 if element["type"] == "node" and coords:
-                    geometry = Point(coords[0])
+                    coords = coords[0]
                 elif element["type"] == "way" and coords:
-                    # For ways, create a polygon and get centroid
+                    # For ways, reduce the outline to its centroid
                     if len(coords) >= 3:
-                        polygon = Polygon(coords)
-                        geometry = Point(polygon.centroid.x, polygon.centroid.y)
+                        coords = self._ring_centroid(coords)
                     else:
                         continue
                 else:
                     continue
-                
-                feature = {
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": coords
-                    },
-                    "properties": {
-                        "id": element["id"],
-                        "amenity": element.get("tags", {}).get("amenity", ""),
-                        "name": element.get("tags", {}).get("name", ""),
-                        "shop": element.get("tags", {}).get("shop", ""),
-                        "tourism": element.get("tags", {}).get("tourism", ""),
-                        "leisure": element.get("tags", {}).get("leisure", ""),
-                        "healthcare": element.get("tags", {}).get("healthcare", ""),
-                        "office": element.get("tags", {}).get("office", ""),
-                        "government": element.get("tags", {}).get("government", "")
-                    }
+            else:
+                continue
+            
+            feature = {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": coords
+                },
+                "properties": {
+                    "id": element["id"],
+                    "amenity": element.get("tags", {}).get("amenity", ""),
+                    "name": element.get("tags", {}).get("name", ""),
+                    "shop": element.get("tags", {}).get("shop", ""),
+                    "tourism": element.get("tags", {}).get("tourism", ""),
+                    "leisure": element.get("tags", {}).get("leisure", ""),
+                    "healthcare": element.get("tags", {}).get("healthcare", ""),
+                    "office": element.get("tags", {}).get("office", ""),
+                    "government": element.get("tags", {}).get("government", "")
                 }
-                features.append(feature)
+            }
+            features.append(feature)
         
         return "amenities", features, {"count": len(features)}
     
-    async def _extract_pois(self, client: httpx.AsyncClient, bbox: str) -> Tuple[str, List[Dict], Dict]:
-        """Extract POI data (same as amenities for now)"""
-        return await self._extract_amenities(client, bbox)
+    def _ring_centroid(self, coords: List[List[float]]) -> List[float]:
+        """Area-weighted (shoelace) centroid of a ring, as [lon, lat]"""
+        arr = np.asarray(coords, dtype=np.float64)
+        # Work relative to the first vertex to keep the products well conditioned
+        x0, y0 = arr[0, 0], arr[0, 1]
+        x, y = arr[:, 0] - x0, arr[:, 1] - y0
+        x1, y1 = np.roll(x, -1), np.roll(y, -1)
+        cross = x * y1 - x1 * y
+        area = cross.sum() / 2
+        if abs(area) < 1e-14:
+            # Degenerate outline (e.g. a line); fall back to the vertex mean
+            return [float(x.mean() + x0), float(y.mean() + y0)]
+        return [
+            float(((x + x1) * cross).sum() / (6 * area) + x0),
+            float(((y + y1) * cross).sum() / (6 * area) + y0)
+        ]
     
-    def _calculate_length(self, geometry: LineString) -> float:
-        """Calculate length of LineString in meters"""
-        # Use Web Mercator projection for accurate distance calculation
-        wgs84 = pyproj.CRS('EPSG:4326')
-        web_mercator = pyproj.CRS('EPSG:3857')
-        project = pyproj.Transformer.from_crs(wgs84, web_mercator, always_xy=True).transform
-        projected_geom = transform(project, geometry)
-        return projected_geom.length
+    def _project_flat(self, parts: List[List[List[float]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Project all coordinate lists to Web Mercator in one call
+
+        Returns the flat x/y arrays and the start offset of each part.
+        """
+        counts = np.fromiter((len(p) for p in parts), dtype=np.intp, count=len(parts))
+        offsets = np.zeros(len(parts), dtype=np.intp)
+        np.cumsum(counts[:-1], out=offsets[1:])
+        flat = np.asarray([coord[:2] for p in parts for coord in p], dtype=np.float64)
+        x, y = self._to_mercator(flat[:, 0], flat[:, 1])
+        return np.asarray(x), np.asarray(y), offsets
+    
+    def _batch_lengths(self, lines: List[List[List[float]]]) -> np.ndarray:
+        """Length in meters of each LineString, in Web Mercator"""
+        x, y, offsets = self._project_flat(lines)
+        seg = np.hypot(np.diff(x), np.diff(y))
+        # Drop the jumps from the end of one line to the start of the next
+        seg[offsets[1:] - 1] = 0.0
+        return np.add.reduceat(seg, offsets)
     
-    def _calculate_area(self, geometry: Polygon) -> float:
-        """Calculate area of Polygon in square meters"""
-        # Use Web Mercator projection for accurate area calculation
-        wgs84 = pyproj.CRS('EPSG:4326')
-        web_mercator = pyproj.CRS('EPSG:3857')
-        project = pyproj.Transformer.from_crs(wgs84, web_mercator, always_xy=True).transform
-        projected_geom = transform(project, geometry)
-        return projected_geom.area
+    def _batch_areas(self, rings: List[List[List[float]]]) -> np.ndarray:
+        """Geodesic area in square meters of each closed ring on the WGS84 ellipsoid"""
+        polygon_area = self._geod.polygon_area_perimeter
+        return np.fromiter(
+            (abs(polygon_area([c[0] for c in ring], [c[1] for c in ring])[0]) for ring in rings),
+            dtype=np.float64, count=len(rings)
+        )
+
+
+def encode_geojson(result: Dict[str, Any], batch_size: int = 1000) -> Iterator[bytes]:
+    """Serialize an extract result as a stream of JSON byte chunks
+
+    Layer FeatureCollections are written a batch of features at a time, so
+    a large extract never has to exist as one contiguous bytes object.
+    RawFeature records become GeoJSON Features only here.
+    """
+    yield b"{"
+    for key, value in result.items():
+        if key != "layers":
+            yield orjson.dumps(key) + b":" + orjson.dumps(value) + b","
+    yield b'"layers":{'
+    for i, (name, layer) in enumerate(result.get("layers", {}).items()):
+        prefix = (b"," if i else b"") + orjson.dumps(name) + b":"
+        if "features" not in layer:
+            # e.g. classified POIs: a mapping of category -> FeatureCollection
+            yield prefix + orjson.dumps(layer)
+            continue
+        features = layer["features"]
+        header = {k: v for k, v in layer.items() if k != "features"}
+        # Reopen the layer object without its closing brace to append features
+        yield prefix + orjson.dumps(header)[:-1]
+        yield b',"features":[' if header else b'"features":['
+        for start in range(0, len(features), batch_size):
+            chunk = orjson.dumps(
+                features[start:start + batch_size],
+                default=_to_geojson, option=orjson.OPT_PASSTHROUGH_DATACLASS
+            )[1:-1]
+            yield (b"," if start else b"") + chunk
+        yield b"]}"
+    yield b"}}"
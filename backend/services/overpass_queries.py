@@ -1,48 +1,52 @@
+ROAD_CLASSES = (
+    "motorway", "trunk", "primary", "secondary", "tertiary", "unclassified",
+    "residential", "service", "living_street", "pedestrian", "track", "path",
+    "footway", "cycleway", "bridleway", "steps"
+)
+
+AMENITY_KEYS = ("amenity", "shop", "tourism", "leisure", "healthcare", "office", "government")
+
 class OverpassQueries:
-    """Overpass API query templates"""
+    """Overpass API query templates
+    
+    Only the bbox ever changes between requests, so each query is built once
+    with a {bbox} placeholder and filled in per call.
+    """
+    
+    def __init__(self):
+        road_pattern = "|".join(ROAD_CLASSES)
+        self._roads_tpl = (
+            "[out:json][timeout:25];"
+            f'(way["highway"~"^({road_pattern})$"]({{bbox}}););'
+            "out geom;"
+        )
+        self._buildings_tpl = (
+            "[out:json][timeout:25];"
+            '(way["building"]({bbox}););'
+            "out geom;"
+        )
+        amenity_filters = "".join(
+            f'{kind}["{key}"]({{bbox}});'
+            for kind in ("node", "way")
+            for key in AMENITY_KEYS
+        )
+        self._amenities_tpl = (
+            "[out:json][timeout:25];"
+            f"({amenity_filters});"
+            "out center;"
+        )
     
     def get_roads_query(self, bbox: str) -> str:
         """Generate Overpass query for road network"""
-        return f"""
-        [out:json][timeout:25];
-        (
-          way["highway"~"^(motorway|trunk|primary|secondary|tertiary|unclassified|residential|service|living_street|pedestrian|track|path|footway|cycleway|bridleway|steps)$"]({bbox});
-        );
-        out geom;
-        """
+        return self._roads_tpl.format(bbox=bbox)
     
     def get_buildings_query(self, bbox: str) -> str:
         """Generate Overpass query for buildings"""
-        return f"""
-        [out:json][timeout:25];
-        (
-          way["building"]({bbox});
-        );
-        out geom;
-        """
+        return self._buildings_tpl.format(bbox=bbox)
     
     def get_amenities_query(self, bbox: str) -> str:
         """Generate Overpass query for amenities and POIs"""
-        return f"""
-        [out:json][timeout:25];
-        (
-          node["amenity"]({bbox});
-          node["shop"]({bbox});
-          node["tourism"]({bbox});
-          node["leisure"]({bbox});
-          node["healthcare"]({bbox});
-          node["office"]({bbox});
-          node["government"]({bbox});
-          way["amenity"]({bbox});
-          way["shop"]({bbox});
-          way["tourism"]({bbox});
-          way["leisure"]({bbox});
-          way["healthcare"]({bbox});
-          way["office"]({bbox});
-          way["government"]({bbox});
-        );
-        out geom;
-        """
+        return self._amenities_tpl.format(bbox=bbox)
     
     def get_pois_query(self, bbox: str) -> str:
         """Generate Overpass query for POIs (same as amenities)"""
@@ -1,12 +1,36 @@
-import json
-from typing import Dict, List, Any
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 class POIClassifier:
-    """Classify POIs into predefined categories"""
+    """Classify POIs into predefined categories
+
+    Works on plain GeoJSON dicts in and out; serialization happens only at
+    the HTTP boundary.
+    """
     
     def __init__(self):
         self.classification_rules = self._load_classification_rules()
+        self._exact, self._wild = self._compile_rules(self.classification_rules)
+    
+    def _compile_rules(
+        self, classification_rules: Dict[str, List[str]]
+    ) -> Tuple[Dict[Tuple[str, str], Tuple[int, str]], Dict[str, Tuple[int, str]]]:
+        """Compile "key=value" / "key=*" rules into lookup tables
+
+        Values carry the rule's position so that, as before, the first
+        matching rule in classification_rules wins.
+        """
+        exact = {}
+        wild = {}
+        priority = 0
+        for category, rules in classification_rules.items():
+            for rule in rules:
+                key, value = rule.split("=", 1)
+                if value == "*":
+                    wild.setdefault(key, (priority, category))
+                else:
+                    exact.setdefault((key, value), (priority, category))
+                priority += 1
+        return exact, wild
     
     def _load_classification_rules(self) -> Dict[str, List[str]]:
         """Load POI classification rules from config"""
@@ -53,69 +77,35 @@ class POIClassifier:
     
     def classify_pois(self, pois: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """Classify POIs into categories and return organized FeatureCollections"""
-        classified_pois = {}
-        count_by_class = {}
-        
-        # Initialize empty FeatureCollections for each category
-        for category in self.classification_rules.keys():
-            classified_pois[category] = {
-                "type": "FeatureCollection",
-                "features": []
-            }
-            count_by_class[category] = 0
-        
-        # Add "Other" category for unmatched POIs
-        classified_pois["Other"] = {
-            "type": "FeatureCollection",
-            "features": []
+        # Initialize empty FeatureCollections for each category, plus
+        # "Other" for unmatched POIs
+        classified_pois = {
+            category: {"type": "FeatureCollection", "features": []}
+            for category in (*self.classification_rules, "Other")
         }
-        count_by_class["Other"] = 0
         
-        # Classify each POI
+        # Classify each POI in a single pass, appending straight onto the
+        # category's feature list
+        buckets = {category: fc["features"] for category, fc in classified_pois.items()}
+        classify = self._classify_single_poi
         for feature in pois.get("features", []):
-            poi_class = self._classify_single_poi(feature)
-            
-            # Add to appropriate category
-            if poi_class in classified_pois:
-                classified_pois[poi_class]["features"].append(feature)
-                count_by_class[poi_class] += 1
-            else:
-                classified_pois["Other"]["features"].append(feature)
-                count_by_class["Other"] += 1
+            buckets[classify(feature)].append(feature)
         
         return classified_pois
     
     def _classify_single_poi(self, feature: Dict[str, Any]) -> str:
         """Classify a single POI based on its properties"""
-        props = feature.get("properties", {})
-        
-        # Check each category's rules
-        for category, rules in self.classification_rules.items():
-            if self._matches_rules(props, rules):
-                return category
-        
-        return "Other"
-    
-    def _matches_rules(self, properties: Dict[str, Any], rules: List[str]) -> bool:
-        """Check if POI properties match any of the classification rules"""
-        for rule in rules:
-            if self._matches_rule(properties, rule):
-                return True
-        return False
-    
-    def _matches_rule(self, properties: Dict[str, Any], rule: str) -> bool:
-        """Check if POI properties match a specific rule"""
-        if "=" in rule:
-            key, value = rule.split("=", 1)
-            
-            if value == "*":
-                # Any value for this key
-                return key in properties and properties[key]
-            else:
-                # Specific value
-                return properties.get(key) == value
+        best = None
+        for key, value in feature.get("properties", {}).items():
+            hit = self._exact.get((key, value))
+            if hit is not None and (best is None or hit < best):
+                best = hit
+            if value:
+                hit = self._wild.get(key)
+                if hit is not None and (best is None or hit < best):
+                    best = hit
         
-        return False
+        return best[1] if best is not None else "Other"
     
     def get_classification_summary(self, classified_pois: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
         """Get summary of POI counts by class"""
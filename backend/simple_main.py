@@ -1,27 +1,67 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import httpx
-import json
+import orjson
 import asyncio
 from datetime import datetime
 
 app = FastAPI(
     title="OSM Map Exporter API",
     description="Extract OSM data and export styled maps as PDF/PPTX",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+class CORSASGI:
+    """Minimal CORS for the dev origins, patching response headers in place"""
+    
+    def __init__(self, app, origins: List[str]):
+        self.app = app
+        self.origins = {origin.encode() for origin in origins}
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin")
+        if origin not in self.origins:
+            return await self.app(scope, receive, send)
+        
+        cors_headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+        
+        # Answer preflight requests directly
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": cors_headers + [
+                    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+                    (b"access-control-allow-headers", headers.get(b"access-control-request-headers", b"*")),
+                    (b"access-control-max-age", b"600"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 # CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(CORSASGI, origins=["http://localhost:3000", "http://localhost:5173"])
 
 class BoundingBox(BaseModel):
     min_lon: float
@@ -51,93 +91,102 @@ async def health_check():
     """Health check endpoint"""
     return {"ok": True, "timestamp": datetime.now().isoformat()}
 
-@app.post("/api/extract", response_model=ExtractResponse)
-async def extract_osm_data(request: ExtractRequest):
-    """Extract OSM data for specified area and layers"""
-    try:
-        # Mock data for testing
-        mock_data = {
-            "bbox": request.bbox or BoundingBox(
-                min_lon=44.5, min_lat=40.1, max_lon=44.6, max_lat=40.2
-            ),
-            "crs": "EPSG:4326",
-            "summary": LayerSummary(
-                roads_km=15.5,
-                buildings_n=250,
-                amenities_n=45,
-                poi_n_by_class={
-                    "Retail/Trade": 12,
-                    "Government": 3,
-                    "Education": 8,
-                    "Health": 5,
-                    "Transport": 7,
-                    "Culture/Leisure": 4,
-                    "Hospitality": 6
-                }
-            ),
-            "layers": {
-                "roads": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "geometry": {
-                                "type": "LineString",
-                                "coordinates": [[44.5, 40.1], [44.6, 40.2]]
-                            },
-                            "properties": {
-                                "highway": "primary",
-                                "name": "Test Road"
-                            }
+def _mock_response(bbox: Dict[str, float]) -> Dict[str, Any]:
+    """Build the mock extract response for a bbox as plain dicts"""
+    mock_data = {
+        "bbox": bbox,
+        "crs": "EPSG:4326",
+        "summary": {
+            "roads_km": 15.5,
+            "buildings_n": 250,
+            "amenities_n": 45,
+            "poi_n_by_class": {
+                "Retail/Trade": 12,
+                "Government": 3,
+                "Education": 8,
+                "Health": 5,
+                "Transport": 7,
+                "Culture/Leisure": 4,
+                "Hospitality": 6
+            }
+        },
+        "layers": {
+            "roads": {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {
+                            "type": "LineString",
+                            "coordinates": [[44.5, 40.1], [44.6, 40.2]]
+                        },
+                        "properties": {
+                            "highway": "primary",
+                            "name": "Test Road"
                         }
-                    ]
-                },
-                "buildings": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "geometry": {
-                                "type": "Polygon",
-                                "coordinates": [[[44.51, 40.11], [44.52, 40.11], [44.52, 40.12], [44.51, 40.12], [44.51, 40.11]]]
-                            },
-                            "properties": {
-                                "building": "yes",
-                                "name": "Test Building"
-                            }
+                    }
+                ]
+            },
+            "buildings": {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {
+                            "type": "Polygon",
+                            "coordinates": [[[44.51, 40.11], [44.52, 40.11], [44.52, 40.12], [44.51, 40.12], [44.51, 40.11]]]
+                        },
+                        "properties": {
+                            "building": "yes",
+                            "name": "Test Building"
                         }
-                    ]
-                },
-                "amenities": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "geometry": {
-                                "type": "Point",
-                                "coordinates": [44.515, 40.115]
-                            },
-                            "properties": {
-                                "amenity": "restaurant",
-                                "name": "Test Restaurant"
-                            }
+                    }
+                ]
+            },
+            "amenities": {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [44.515, 40.115]
+                        },
+                        "properties": {
+                            "amenity": "restaurant",
+                            "name": "Test Restaurant"
                         }
-                    ]
-                },
-                "pois": {
-                    "Retail/Trade": {
-                        "type": "FeatureCollection",
-                        "features": []
-                    },
-                    "Government": {
-                        "type": "FeatureCollection",
-                        "features": []
                     }
+                ]
+            },
+            "pois": {
+                "Retail/Trade": {
+                    "type": "FeatureCollection",
+                    "features": []
+                },
+                "Government": {
+                    "type": "FeatureCollection",
+                    "features": []
                 }
             }
         }
+    }
+    return mock_data
+
+# The no-bbox debug response never changes; serialize it once
+_DEFAULT_BBOX = {"min_lon": 44.5, "min_lat": 40.1, "max_lon": 44.6, "max_lat": 40.2}
+_MOCK_BYTES = orjson.dumps(_mock_response(_DEFAULT_BBOX))
+
+# ExtractResponse documents the schema; the payload is built server-side, so
+# it isn't re-validated on the way out
+@app.post("/api/extract", responses={200: {"model": ExtractResponse}})
+async def extract_osm_data(request: ExtractRequest):
+    """Extract OSM data for specified area and layers"""
+    try:
+        if request.bbox is None:
+            return Response(_MOCK_BYTES, media_type="application/json")
         
-        return ExtractResponse(**mock_data)
+        return ORJSONResponse(_mock_response(request.bbox.model_dump()))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -158,5 +207,10 @@ async def download_file(filename: str):
     return {"message": f"File {filename} not found - export not yet implemented"}
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One worker process per core; the app holds no mutable shared state.
+    # In production: gunicorn simple_main:app -k uvicorn.workers.UvicornWorker -w $(nproc) --bind 0.0.0.0:8000
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # "auto" picks uvloop + httptools when uvicorn[standard] is installed
+    uvicorn.run("simple_main:app", host="0.0.0.0", port=8000, workers=workers, loop="auto", http="auto")
@@ -6,12 +6,25 @@ Simple OSM data extractor with better error handling
 import httpx
 import json
 import asyncio
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 class SimpleOSMExtractor:
     def __init__(self):
         self.overpass_url = "https://overpass-api.de/api/interpreter"
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         
     async def extract_data(self, bbox: Dict[str, float], layers: List[str]) -> Dict[str, Any]:
         """Extract OSM data using Overpass API with better error handling"""
@@ -35,10 +48,10 @@ class SimpleOSMExtractor:
             print(f"🔍 Querying Overpass API for bbox: {overpass_bbox}")
             
             # Make request to Overpass API
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.overpass_url, data=query)
-                response.raise_for_status()
-                data = response.json()
+            client = await self._get_client()
+            response = await client.post(self.overpass_url, data=query)
+            response.raise_for_status()
+            data = response.json()
             
             print(f"📊 Received {len(data.get('elements', []))} elements from Overpass")
             
@@ -259,6 +272,7 @@ async def test_extractor():
     }
     
     result = await extractor.extract_data(bbox, ["roads", "buildings", "amenities"])
+    await extractor.aclose()
     print(f"Found {len(result['layers']['roads']['features'])} roads")
     print(f"Found {len(result['layers']['buildings']['features'])} buildings")
     print(f"Found {len(result['layers']['amenities']['features'])} amenities")
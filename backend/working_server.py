@@ -4,60 +4,345 @@ Working HTTP server for OSM Map Exporter
 Returns realistic mock data for testing
 """
 
-import json
+import orjson
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import gzip
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
+from dataclasses import dataclass
 from datetime import datetime
-import random
+from typing import Optional
+import numpy as np
+try:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+    from starlette.middleware.gzip import GZipMiddleware
+    from starlette.responses import HTMLResponse, Response
+    from starlette.routing import Route
+except ImportError:
+    # Fall back to the stdlib HTTP server below
+    uvicorn = None
+
+_rng = np.random.default_rng()
+
+# Safety ceiling per layer so a pathological bbox can't exhaust memory
+MAX_FEATURES = 100_000
+
+# Share of amenities per POI class in the mock summary
+_POI_RATIOS = (
+    ("Retail/Trade", 0.3),
+    ("Government", 0.1),
+    ("Education", 0.15),
+    ("Health", 0.1),
+    ("Transport", 0.1),
+    ("Culture/Leisure", 0.1),
+    ("Hospitality", 0.1),
+    ("Finance", 0.05),
+    ("Services", 0.05),
+    ("Religious", 0.05)
+)
+_POI_CLASS_NAMES = tuple(name for name, _ in _POI_RATIOS)
+_POI_RATIO_VALUES = np.fromiter((ratio for _, ratio in _POI_RATIOS), dtype=np.float64)
+
+# Landing page, encoded once; every root request writes the same bytes
+ROOT_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>OSM Map Exporter API</title>
+</head>
+<body>
+    <h1>🗺️ OSM Map Exporter API</h1>
+    <p>API Server is running!</p>
+    <p>Endpoints:</p>
+    <ul>
+        <li>GET /api/health - Health check</li>
+        <li>POST /api/extract - Extract OSM data</li>
+        <li>POST /api/export/pdf - Export PDF</li>
+        <li>POST /api/export/pptx - Export PPTX</li>
+    </ul>
+</body>
+</html>
+""".encode()
+
+def health_payload():
+    """Health check response body"""
+    return {
+        "ok": True,
+        "timestamp": datetime.now().isoformat()
+    }
+
+EXPORT_PAYLOADS = {
+    '/api/export/pdf': {
+        "url": "/download/test.pdf",
+        "message": "PDF export not yet implemented"
+    },
+    '/api/export/pptx': {
+        "url": "/download/test.pptx",
+        "message": "PPTX export not yet implemented"
+    }
+}
+
+def build_extract_response(request_data):
+    """Generate the mock /api/extract response for a parsed request body"""
+    print(f"🔍 Extract request received: {request_data}")
+    
+    try:
+        # Get bbox and layers
+        bbox = request_data.get('bbox', {
+            "min_lon": 44.5,
+            "min_lat": 40.1,
+            "max_lon": 44.6,
+            "max_lat": 40.2
+        })
+        layers = request_data.get('layers', ['roads', 'buildings', 'amenities', 'pois'])
+        
+        print(f"📍 Bbox: {bbox}")
+        print(f"📊 Layers: {layers}")
+        
+        # Generate realistic mock data based on bbox size
+        bbox_area = (bbox['max_lon'] - bbox['min_lon']) * (bbox['max_lat'] - bbox['min_lat'])
+        area_factor = bbox_area * 1000  # Scale factor
+        
+        # Generate data
+        roads_km = max(5, int(area_factor * 2))
+        buildings_n = max(50, int(area_factor * 10))
+        amenities_n = max(10, int(area_factor * 2))
+        
+        # Generate POI classification
+        poi_counts = np.maximum(1, (_POI_RATIO_VALUES * amenities_n).astype(int)).tolist()
+        poi_classes = dict(zip(_POI_CLASS_NAMES, poi_counts))
+        
+        # Build response
+        response = {
+            "bbox": bbox,
+            "crs": "EPSG:4326",
+            "summary": {
+                "roads_km": roads_km,
+                "buildings_n": buildings_n,
+                "amenities_n": amenities_n,
+                "poi_n_by_class": poi_classes
+            },
+            "layers": {}
+        }
+        
+        # Add layers based on request
+        if "roads" in layers:
+            response["layers"]["roads"] = {
+                "type": "FeatureCollection",
+                "features": _generate_road_features(bbox, roads_km)
+            }
+        
+        if "buildings" in layers:
+            response["layers"]["buildings"] = {
+                "type": "FeatureCollection",
+                "features": _generate_building_features(bbox, buildings_n)
+            }
+        
+        if "amenities" in layers:
+            response["layers"]["amenities"] = {
+                "type": "FeatureCollection",
+                "features": _generate_amenity_features(bbox, amenities_n)
+            }
+        
+        if "pois" in layers:
+            response["layers"]["pois"] = _generate_all_poi_features(bbox, poi_classes)
+        
+        print(f"✅ Generated mock data: {roads_km}km roads, {buildings_n} buildings, {amenities_n} amenities")
+    
+    except Exception as e:
+        print(f"❌ Error generating data: {str(e)}")
+        response = {
+            "bbox": bbox,
+            "crs": "EPSG:4326",
+            "summary": {
+                "roads_km": 0,
+                "buildings_n": 0,
+                "amenities_n": 0,
+                "poi_n_by_class": {}
+            },
+            "layers": {
+                "roads": {"type": "FeatureCollection", "features": []},
+                "buildings": {"type": "FeatureCollection", "features": []},
+                "amenities": {"type": "FeatureCollection", "features": []},
+                "pois": {}
+            },
+            "error": f"Data generation failed: {str(e)}"
+        }
+    
+    return response
+
+@dataclass
+class PointBatch:
+    """Structure-of-arrays for a batch of generated points"""
+    coords: np.ndarray  # (n, 2) lon/lat rows
+    kinds: Optional[np.ndarray] = None
+
+def _draw_points(bbox, n, n_kinds=0):
+    """Draw n uniform points inside bbox, plus a category index per point if n_kinds"""
+    coords = _rng.uniform([bbox['min_lon'], bbox['min_lat']], [bbox['max_lon'], bbox['max_lat']], size=(n, 2))
+    kinds = _rng.integers(0, n_kinds, n) if n_kinds else None
+    return PointBatch(coords, kinds)
+
+_HIGHWAY_TYPES = ("primary", "secondary", "residential", "service")
+_AMENITY_TYPES = ("restaurant", "cafe", "shop", "bank", "pharmacy", "hospital", "school", "church")
+# Object arrays of the same names, for gathering one name per drawn index
+_HIGHWAY_NAMES = np.array(_HIGHWAY_TYPES, dtype=object)
+_AMENITY_NAMES = np.array(_AMENITY_TYPES, dtype=object)
+
+# Corner offsets of a small (0.001 deg) mock building footprint, closed ring
+_BUILDING_OFFSETS = 0.001 * np.array([[-1, -1], [1, -1], [1, 1], [-1, 1], [-1, -1]], dtype=np.float64)
+
+def encode_json(payload) -> bytes:
+    """Serialize a response; coordinates may be NumPy rows, written by orjson directly"""
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _generate_road_features(bbox, count):
+    """Generate mock road features"""
+    n = min(count, MAX_FEATURES)
+    starts = _draw_points(bbox, n, len(_HIGHWAY_TYPES))
+    ends = _draw_points(bbox, n)
+    # (n, 2, 2): start and end vertex of each road
+    lines = np.stack((starts.coords, ends.coords), axis=1)
+    highways = _HIGHWAY_NAMES[starts.kinds].tolist()
+    
+    return [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": line
+            },
+            "properties": {
+                "id": f"road_{i}",
+                "highway": highway,
+                "name": f"Road {i+1}",
+                "oneway": "no"
+            }
+        }
+        for i, (line, highway) in enumerate(zip(lines, highways))
+    ]
+
+def _generate_building_features(bbox, count):
+    """Generate mock building features"""
+    n = min(count, MAX_FEATURES)
+    centers = _draw_points(bbox, n)
+    # (n, 5, 2): closed square ring around each center
+    rings = centers.coords[:, None, :] + _BUILDING_OFFSETS
+    
+    return [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [ring]
+            },
+            "properties": {
+                "id": f"building_{i}",
+                "building": "yes",
+                "name": f"Building {i+1}"
+            }
+        }
+        for i, ring in enumerate(rings)
+    ]
+
+def _generate_amenity_features(bbox, count):
+    """Generate mock amenity features"""
+    n = min(count, MAX_FEATURES)
+    batch = _draw_points(bbox, n, len(_AMENITY_TYPES))
+    amenities = _AMENITY_NAMES[batch.kinds].tolist()
+    
+    return [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": point
+            },
+            "properties": {
+                "id": f"amenity_{i}",
+                "name": f"Amenity {i+1}",
+                "amenity": amenity
+            }
+        }
+        for i, (point, amenity) in enumerate(zip(batch.coords, amenities))
+    ]
+
+def _generate_all_poi_features(bbox, poi_classes):
+    """Generate mock POI FeatureCollections for every class from one batched draw"""
+    counts = [min(count, MAX_FEATURES) for count in poi_classes.values()]
+    batch = _draw_points(bbox, sum(counts))
+    
+    collections = {}
+    offset = 0
+    for poi_class, n in zip(poi_classes, counts):
+        points = batch.coords[offset:offset + n]
+        offset += n
+        collections[poi_class] = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": point
+                    },
+                    "properties": {
+                        "id": f"poi_{poi_class}_{i}",
+                        "name": f"{poi_class} {i+1}",
+                        "class": poi_class
+                    }
+                }
+                for i, point in enumerate(points)
+            ]
+        }
+    return collections
 
 class OSMRequestHandler(BaseHTTPRequestHandler):
+    """Stdlib fallback used when uvicorn/Starlette aren't installed"""
+    
+    # Every response carries Content-Length, so connections can be kept alive
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in one flush
+    wbufsize = 64 * 1024
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    def _write_body(self, body, content_type, status=200, extra_headers=()):
+        """Send a complete response with Content-Length and one body write"""
+        gzipped = len(body) >= 1024 and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body, compresslevel=1)
+        
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_json(self, obj, status=200, extra_headers=()):
+        """Serialize obj and send it as a JSON response"""
+        self._write_body(encode_json(obj), 'application/json', status, extra_headers)
+
     def do_GET(self):
         """Handle GET requests"""
         parsed_path = urlparse(self.path)
         
         if parsed_path.path == '/api/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {
-                "ok": True,
-                "timestamp": datetime.now().isoformat()
-            }
-            self.wfile.write(json.dumps(response).encode())
+            self._write_json(health_payload())
         else:
             # Handle root path
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>OSM Map Exporter API</title>
-            </head>
-            <body>
-                <h1>🗺️ OSM Map Exporter API</h1>
-                <p>API Server is running!</p>
-                <p>Endpoints:</p>
-                <ul>
-                    <li>GET /api/health - Health check</li>
-                    <li>POST /api/extract - Extract OSM data</li>
-                    <li>POST /api/export/pdf - Export PDF</li>
-                    <li>POST /api/export/pptx - Export PPTX</li>
-                </ul>
-            </body>
-            </html>
-            """
-            self.wfile.write(html.encode())
+            self._write_body(ROOT_HTML, 'text/html')
 
     def do_POST(self):
         """Handle POST requests"""
@@ -68,152 +353,22 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
         post_data = self.rfile.read(content_length)
         
         try:
-            request_data = json.loads(post_data.decode('utf-8'))
-        except:
+            request_data = orjson.loads(post_data)
+        except orjson.JSONDecodeError:
             request_data = {}
         
         if parsed_path.path == '/api/extract':
-            print(f"🔍 Extract request received: {request_data}")
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
-            try:
-                # Get bbox and layers
-                bbox = request_data.get('bbox', {
-                    "min_lon": 44.5,
-                    "min_lat": 40.1,
-                    "max_lon": 44.6,
-                    "max_lat": 40.2
-                })
-                layers = request_data.get('layers', ['roads', 'buildings', 'amenities', 'pois'])
-                
-                print(f"📍 Bbox: {bbox}")
-                print(f"📊 Layers: {layers}")
-                
-                # Generate realistic mock data based on bbox size
-                bbox_area = (bbox['max_lon'] - bbox['min_lon']) * (bbox['max_lat'] - bbox['min_lat'])
-                area_factor = bbox_area * 1000  # Scale factor
-                
-                # Generate data
-                roads_km = max(5, int(area_factor * 2))
-                buildings_n = max(50, int(area_factor * 10))
-                amenities_n = max(10, int(area_factor * 2))
-                
-                # Generate POI classification
-                poi_classes = {
-                    "Retail/Trade": max(2, int(amenities_n * 0.3)),
-                    "Government": max(1, int(amenities_n * 0.1)),
-                    "Education": max(1, int(amenities_n * 0.15)),
-                    "Health": max(1, int(amenities_n * 0.1)),
-                    "Transport": max(1, int(amenities_n * 0.1)),
-                    "Culture/Leisure": max(1, int(amenities_n * 0.1)),
-                    "Hospitality": max(1, int(amenities_n * 0.1)),
-                    "Finance": max(1, int(amenities_n * 0.05)),
-                    "Services": max(1, int(amenities_n * 0.05)),
-                    "Religious": max(1, int(amenities_n * 0.05))
-                }
-                
-                # Build response
-                response = {
-                    "bbox": bbox,
-                    "crs": "EPSG:4326",
-                    "summary": {
-                        "roads_km": roads_km,
-                        "buildings_n": buildings_n,
-                        "amenities_n": amenities_n,
-                        "poi_n_by_class": poi_classes
-                    },
-                    "layers": {}
-                }
-                
-                # Add layers based on request
-                if "roads" in layers:
-                    response["layers"]["roads"] = {
-                        "type": "FeatureCollection",
-                        "features": self._generate_road_features(bbox, roads_km)
-                    }
-                
-                if "buildings" in layers:
-                    response["layers"]["buildings"] = {
-                        "type": "FeatureCollection",
-                        "features": self._generate_building_features(bbox, buildings_n)
-                    }
-                
-                if "amenities" in layers:
-                    response["layers"]["amenities"] = {
-                        "type": "FeatureCollection",
-                        "features": self._generate_amenity_features(bbox, amenities_n)
-                    }
-                
-                if "pois" in layers:
-                    response["layers"]["pois"] = {}
-                    for poi_class, count in poi_classes.items():
-                        response["layers"]["pois"][poi_class] = {
-                            "type": "FeatureCollection",
-                            "features": self._generate_poi_features(bbox, poi_class, count)
-                        }
-                
-                print(f"✅ Generated mock data: {roads_km}km roads, {buildings_n} buildings, {amenities_n} amenities")
-                
-            except Exception as e:
-                print(f"❌ Error generating data: {str(e)}")
-                response = {
-                    "bbox": bbox,
-                    "crs": "EPSG:4326",
-                    "summary": {
-                        "roads_km": 0,
-                        "buildings_n": 0,
-                        "amenities_n": 0,
-                        "poi_n_by_class": {}
-                    },
-                    "layers": {
-                        "roads": {"type": "FeatureCollection", "features": []},
-                        "buildings": {"type": "FeatureCollection", "features": []},
-                        "amenities": {"type": "FeatureCollection", "features": []},
-                        "pois": {}
-                    },
-                    "error": f"Data generation failed: {str(e)}"
-                }
-            
-            self.wfile.write(json.dumps(response).encode())
-            
-        elif parsed_path.path == '/api/export/pdf':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {
-                "url": "/download/test.pdf",
-                "message": "PDF export not yet implemented"
-            }
-            self.wfile.write(json.dumps(response).encode())
-            
-        elif parsed_path.path == '/api/export/pptx':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            response = build_extract_response(request_data)
+            self._write_json(response, extra_headers=(
+                ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+                ('Access-Control-Allow-Headers', 'Content-Type')
+            ))
             
-            response = {
-                "url": "/download/test.pptx",
-                "message": "PPTX export not yet implemented"
-            }
-            self.wfile.write(json.dumps(response).encode())
+        elif parsed_path.path in EXPORT_PAYLOADS:
+            self._write_json(EXPORT_PAYLOADS[parsed_path.path])
             
         else:
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {"error": "Not found"}
-            self.wfile.write(json.dumps(response).encode())
+            self._write_json({"error": "Not found"}, status=404)
 
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
@@ -222,110 +377,60 @@ class OSMRequestHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.send_header('Access-Control-Allow-Credentials', 'true')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
-    def _generate_road_features(self, bbox, count):
-        """Generate mock road features"""
-        features = []
-        for i in range(min(count, 20)):  # Limit to 20 features for performance
-            # Generate random line within bbox
-            start_lon = bbox['min_lon'] + random.random() * (bbox['max_lon'] - bbox['min_lon'])
-            start_lat = bbox['min_lat'] + random.random() * (bbox['max_lat'] - bbox['min_lat'])
-            end_lon = bbox['min_lon'] + random.random() * (bbox['max_lon'] - bbox['min_lon'])
-            end_lat = bbox['min_lat'] + random.random() * (bbox['max_lat'] - bbox['min_lat'])
-            
-            features.append({
-                "type": "Feature",
-                "geometry": {
-                    "type": "LineString",
-                    "coordinates": [[start_lon, start_lat], [end_lon, end_lat]]
-                },
-                "properties": {
-                    "id": f"road_{i}",
-                    "highway": random.choice(["primary", "secondary", "residential", "service"]),
-                    "name": f"Road {i+1}",
-                    "oneway": "no"
-                }
-            })
-        return features
-
-    def _generate_building_features(self, bbox, count):
-        """Generate mock building features"""
-        features = []
-        for i in range(min(count, 50)):  # Limit to 50 features for performance
-            # Generate random polygon within bbox
-            center_lon = bbox['min_lon'] + random.random() * (bbox['max_lon'] - bbox['min_lon'])
-            center_lat = bbox['min_lat'] + random.random() * (bbox['max_lat'] - bbox['min_lat'])
-            size = 0.001  # Small building size
-            
-            features.append({
-                "type": "Feature",
-                "geometry": {
-                    "type": "Polygon",
-                    "coordinates": [[
-                        [center_lon - size, center_lat - size],
-                        [center_lon + size, center_lat - size],
-                        [center_lon + size, center_lat + size],
-                        [center_lon - size, center_lat + size],
-                        [center_lon - size, center_lat - size]
-                    ]]
-                },
-                "properties": {
-                    "id": f"building_{i}",
-                    "building": "yes",
-                    "name": f"Building {i+1}"
-                }
-            })
-        return features
+# ASGI app served by uvicorn
 
-    def _generate_amenity_features(self, bbox, count):
-        """Generate mock amenity features"""
-        features = []
-        amenity_types = ["restaurant", "cafe", "shop", "bank", "pharmacy", "hospital", "school", "church"]
-        
-        for i in range(min(count, 30)):  # Limit to 30 features for performance
-            lon = bbox['min_lon'] + random.random() * (bbox['max_lon'] - bbox['min_lon'])
-            lat = bbox['min_lat'] + random.random() * (bbox['max_lat'] - bbox['min_lat'])
-            
-            features.append({
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [lon, lat]
-                },
-                "properties": {
-                    "id": f"amenity_{i}",
-                    "name": f"Amenity {i+1}",
-                    "amenity": random.choice(amenity_types)
-                }
-            })
-        return features
-
-    def _generate_poi_features(self, bbox, poi_class, count):
-        """Generate mock POI features"""
-        features = []
-        for i in range(min(count, 10)):  # Limit to 10 features per class for performance
-            lon = bbox['min_lon'] + random.random() * (bbox['max_lon'] - bbox['min_lon'])
-            lat = bbox['min_lat'] + random.random() * (bbox['max_lat'] - bbox['min_lat'])
-            
-            features.append({
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [lon, lat]
-                },
-                "properties": {
-                    "id": f"poi_{poi_class}_{i}",
-                    "name": f"{poi_class} {i+1}",
-                    "class": poi_class
-                }
-            })
-        return features
+async def health(request):
+    """Health check endpoint"""
+    return Response(orjson.dumps(health_payload()), media_type="application/json")
+
+async def root(request):
+    """API landing page"""
+    return HTMLResponse(ROOT_HTML)
+
+async def extract(request):
+    """Extract mock OSM data for a bbox"""
+    try:
+        request_data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        request_data = {}
+    # Generation and encoding are CPU-bound; keep them off the event loop
+    body = await asyncio.to_thread(lambda: encode_json(build_extract_response(request_data)))
+    return Response(body, media_type="application/json")
+
+async def export(request):
+    """Mock PDF/PPTX export endpoints"""
+    return Response(orjson.dumps(EXPORT_PAYLOADS[request.url.path]), media_type="application/json")
+
+async def not_found(request):
+    """JSON 404 for unknown POST endpoints"""
+    return Response(orjson.dumps({"error": "Not found"}), status_code=404, media_type="application/json")
+
+if uvicorn is not None:
+    app = Starlette(
+        routes=[
+            Route('/api/health', health, methods=["GET"]),
+            Route('/api/extract', extract, methods=["POST"]),
+            Route('/api/export/pdf', export, methods=["POST"]),
+            Route('/api/export/pptx', export, methods=["POST"]),
+            Route('/{path:path}', root, methods=["GET"]),
+            Route('/{path:path}', not_found, methods=["POST"]),
+        ],
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=["*"],
+                allow_methods=["GET", "POST", "OPTIONS"],
+                allow_headers=["Content-Type"]
+            ),
+            Middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+        ]
+    )
 
 def run_server():
     """Run the HTTP server"""
-    server_address = ('0.0.0.0', 8000)
-    httpd = HTTPServer(server_address, OSMRequestHandler)
     print("🚀 OSM Map Exporter API Server running on http://localhost:8000")
     print("📚 API endpoints:")
     print("  GET  /api/health")
@@ -334,6 +439,15 @@ def run_server():
     print("  POST /api/export/pptx")
     print("\nPress Ctrl+C to stop the server")
     
+    if uvicorn is not None:
+        # "auto" picks uvloop + httptools when uvicorn[standard] is installed
+        uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto")
+        return
+    
+    # One thread per connection, so a slow extract doesn't queue other clients
+    server_address = ('0.0.0.0', 8000)
+    httpd = ThreadingHTTPServer(server_address, OSMRequestHandler)
+    httpd.daemon_threads = True
     try:
         httpd.serve_forever()
     except KeyboardInterrupt: